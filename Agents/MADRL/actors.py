@@ -1,10 +1,9 @@
 """Generic actor implementation, using TensorFlow and Sonnet."""
 
-from typing import Optional, List
+from typing import Optional
 from acme import adders
 from acme import core
 from acme import types
-from acme.tf import utils as tf2_utils
 from acme.tf import variable_utils as tf2_variable_utils
 import dm_env
 import sonnet as snt
@@ -25,7 +24,7 @@ class FeedForwardActor(core.Actor):
 
     def __init__(
         self,
-        policy_networks: List[snt.Module],
+        policy_networks: snt.Module,
         
         edge_number: int,
         edge_action_size: int,
@@ -52,6 +51,11 @@ class FeedForwardActor(core.Actor):
         self._edge_number = edge_number
         self._edge_action_size = edge_action_size
 
+        # Concrete function of `_policy`, traced on the first observation. The
+        # observation shape never changes, so calling it directly skips the
+        # argument matching of the polymorphic `tf.function` on every step.
+        self._policy_function = None
+
     @tf.function(experimental_relax_shapes=True)
     def _policy(
         self, 
@@ -60,19 +64,12 @@ class FeedForwardActor(core.Actor):
         # # Add a dummy batch dimension and as a side effect convert numpy to TF.
         # Compute the policy, conditioned on the observation.
         # myapp.debug(f"observations: {np.array(observations)}")
-        edge_actions = []
-        for i in range(self._edge_number):
-            # myapp.debug(f"i: {i}")
-            edge_observation = observations[i, :]
-            # myapp.debug(f"edge_observation: {np.array(edge_observation)}")
-            edge_batched_observation = tf2_utils.add_batch_dim(edge_observation)
-            # myapp.debug(f"edge_batched_observation: {edge_batched_observation}")
-            edge_policy = self._policy_networks[i](edge_batched_observation)
-            edge_action = edge_policy.sample() if isinstance(edge_policy, tfd.Distribution) else edge_policy
-            # myapp.debug(f"edge_action: {edge_action}")
-            edge_actions.append(edge_action)
+        # The edges share the policy network, so the edge dimension of the
+        # observations, [edge_number, edge_observation_size], is used as the batch.
+        edge_policy = self._policy_networks(observations)
+        edge_actions = edge_policy.sample() if isinstance(edge_policy, tfd.Distribution) else edge_policy
             
-        edge_actions = tf.convert_to_tensor(edge_actions, dtype=tf.float64)
+        edge_actions = tf.cast(edge_actions, dtype=tf.float64)
         # myapp.debug(f"edge_actions: {edge_actions}")
         action = tf.reshape(edge_actions, [self._edge_number, self._edge_action_size])
         # myapp.debug(f"action: {action}")
@@ -80,8 +77,10 @@ class FeedForwardActor(core.Actor):
 
     def select_action(self, observation: types.NestedArray) -> types.NestedArray:
         # Pass the observation through the policy network.
-        action = self._policy(
-            observations=tf.convert_to_tensor(observation, dtype=tf.float64))
+        observations = tf.convert_to_tensor(observation, dtype=tf.float64)
+        if self._policy_function is None:
+            self._policy_function = self._policy.get_concrete_function(observations)
+        action = self._policy_function(observations)
         # Return a numpy array with squeezed out batch dimension.
         return action
 
@@ -2,9 +2,9 @@ import sys
 sys.path.append(r"/home/neardws/Documents/Game-Theoretic-Deep-Reinforcement-Learning/")
 from environment_loop import EnvironmentLoop
 from absl.testing import absltest
-from Agents.MAD4PG import actors
+from Agents.MADRL import actors
 from Environment.environment import make_environment_spec
-from Agents.MAD4PG.networks import make_policy_network
+from Agents.MADRL.networks import make_policy_network
 from Experiment.make_environment import get_default_environment
 
 class ActorTest(absltest.TestCase):
@@ -17,7 +17,7 @@ class ActorTest(absltest.TestCase):
 
         env_spec = make_environment_spec(environment)
 
-        policy_networks = [make_policy_network(env_spec.edge_actions) for _ in range(environment_config.edge_number)]
+        policy_networks = make_policy_network(env_spec.edge_actions)
 
         actor = actors.FeedForwardActor(
             policy_networks=policy_networks,
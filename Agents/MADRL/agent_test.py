@@ -6,8 +6,8 @@ import acme
 import launchpad as lp
 from absl.testing import absltest
 from Environment.environment import vehicularNetworkEnv, make_environment_spec
-from Agents.MAD4PG.networks import make_default_MAD3PGNetworks
-from Agents.MAD4PG.agent import MultiAgentDistributedDDPG, MAD3PGConfig
+from Agents.MADRL.networks import make_default_MAD3PGNetworks
+from Agents.MADRL.agent import MultiAgentDistributedDDPG, MAD3PGConfig
 from Experiment.make_environment import get_default_environment
 
 
@@ -16,7 +16,7 @@ import tensorflow as tf
 import tree
 import tensorflow as tf
 from acme import types
-from Agents.MAD4PG.gradient import GradientTape
+from Agents.MADRL.gradient import GradientTape
 from Environment.dataStruct import edge
 from Log.logger import myapp
 
@@ -32,21 +32,21 @@ class MAD3PGLearner(acme.Learner):
 
     def __init__(
         self,
-        policy_networks: List[snt.Module],
-        critic_networks: List[snt.Module],
+        policy_networks: snt.Module,
+        critic_networks: snt.Module,
         
-        target_policy_networks: List[snt.Module],
-        target_critic_networks: List[snt.Module],
+        target_policy_networks: snt.Module,
+        target_critic_networks: snt.Module,
 
         discount: float,
         target_update_period: int,
-        dataset_iterator: Iterator[reverb.ReplaySample],
+        dataset_iterator: Union[Iterator[reverb.ReplaySample], tf.data.Dataset],
         
-        observation_networks: List[types.TensorTransformation],
-        target_observation_networks: List[types.TensorTransformation],
+        observation_networks: types.TensorTransformation,
+        target_observation_networks: types.TensorTransformation,
 
-        policy_optimizers: List[snt.Optimizer],
-        critic_optimizers: List[snt.Optimizer],
+        policy_optimizers: snt.Optimizer,
+        critic_optimizers: snt.Optimizer,
         
         clipping: bool = True,
         replicator: Optional[Replicator] = None,
@@ -57,9 +57,16 @@ class MAD3PGLearner(acme.Learner):
         
         edge_number: Optional[int] = None,
         edge_action_size: Optional[int] = None,
+        tau: Optional[float] = None,
+        save_period: int = 1000,
+        batch_size: Optional[int] = None,
     ):
         """Initializes the learner.
 
+        The networks are shared by all edges: each one is applied to the
+        observations of every edge at once, with the edge dimension folded into
+        the batch.
+
         Args:
         policy_network: the online (optimized) policy.
         critic_network: the online critic.
@@ -71,6 +78,7 @@ class MAD3PGLearner(acme.Learner):
             the target networks.
         dataset_iterator: dataset to learn from, whether fixed or from a replay
             buffer (see `acme.datasets.reverb.make_reverb_dataset` documentation).
+            A `tf.data.Dataset` of unbatched samples is batched by `_wrap_dataset`.
         observation_network: an optional online network to process observations
             before the policy and the critic.
         target_observation_network: the target observation network.
@@ -83,6 +91,17 @@ class MAD3PGLearner(acme.Learner):
         counter: counter object used to keep track of steps.
         logger: logger object to be used by learner.
         checkpoint: boolean indicating whether to checkpoint the learner.
+        edge_number: the number of edge nodes, by default the edge dimension of
+            the sampled observations.
+        edge_action_size: the size of the action of one edge node, by default the
+            last dimension of the sampled actions.
+        tau: if given, the target networks are Polyak-averaged towards the
+            online networks with this rate on every step, and
+            `target_update_period` is ignored.
+        save_period: number of learner steps between attempts to checkpoint and
+            snapshot the learner (the savers additionally throttle by wall time).
+        batch_size: the batch size to sample with when `dataset_iterator` is a
+            `tf.data.Dataset`; each batch is split over the replicas.
         """
 
         # Store online and target networks.
@@ -93,8 +112,8 @@ class MAD3PGLearner(acme.Learner):
         self._target_critic_networks = target_critic_networks
 
         # Make sure observation networks are snt.Module's so they have variables.
-        self._observation_networks = [tf2_utils.to_sonnet_module(observation_network) for observation_network in observation_networks]
-        self._target_observation_networks = [tf2_utils.to_sonnet_module(target_observation_network) for target_observation_network in target_observation_networks]
+        self._observation_networks = tf2_utils.to_sonnet_module(observation_networks)
+        self._target_observation_networks = tf2_utils.to_sonnet_module(target_observation_networks)
 
         # General learner book-keeping and loggers.
         self._counter = counter or counting.Counter()
@@ -118,26 +137,35 @@ class MAD3PGLearner(acme.Learner):
             # Necessary to track when to update target networks.
             self._num_steps = tf.Variable(0, dtype=tf.int32)
             self._target_update_period = target_update_period
+            self._tau = tau
 
             # Create optimizers if they aren't given.
-            self._policy_optimizers = policy_optimizers or [snt.optimizers.Adam(learning_rate=1e-5) for _ in range(edge_number)]
-            self._critic_optimizers = critic_optimizers or [snt.optimizers.Adam(learning_rate=1e-4) for _ in range(edge_number)]
+            self._policy_optimizers = policy_optimizers or snt.optimizers.Adam(learning_rate=1e-5)
+            self._critic_optimizers = critic_optimizers or snt.optimizers.Adam(learning_rate=1e-4)
 
         # Batch dataset and create iterator.
+        if isinstance(dataset_iterator, tf.data.Dataset):
+            if batch_size is None:
+                raise ValueError('A batch_size is required to learn from a tf.data.Dataset.')
+            dataset = self._wrap_dataset(dataset_iterator, batch_size)
+            # Shard every batch over the replicas, as `make_dataset_iterator` of
+            # the agent does for the Reverb dataset.
+            dataset_iterator = iter(self._replicator.experimental_distribute_dataset(dataset))
         self._iterator = dataset_iterator
 
         # Expose the variables.
         self._variables = dict()
         
-        for i in range(len(self._policy_networks)):
-            policy_network_to_expose = snt.Sequential(
-                [self._target_observation_networks[i], self._target_policy_networks[i]])
-            self._variables[f'critic_network_{i}'] = self._target_critic_networks[i].variables
-            self._variables[f'policy_network_{i}'] = policy_network_to_expose.variables
+        policy_network_to_expose = snt.Sequential(
+            [self._target_observation_networks, self._target_policy_networks])
+        self._variables['critic_network'] = self._target_critic_networks.variables
+        self._variables['policy_network'] = policy_network_to_expose.variables
         
         # Create a checkpointer and snapshotter objects.
         self._checkpointer = None
         self._snapshotter = None
+        self._save_period = save_period
+        self._steps_since_save = 0
 
         if checkpoint:
             self._checkpointer = tf2_savers.Checkpointer(
@@ -155,9 +183,8 @@ class MAD3PGLearner(acme.Learner):
                     'num_steps': self._num_steps,
                 })
             object_to_save = dict()
-            for i in range(len(self._policy_networks)):
-                object_to_save[f'policy_{i}'] = self._policy_networks[i]
-                object_to_save[f'critic_mean_{i}'] = snt.Sequential([self._critic_networks[i], acme_nets.StochasticMeanHead()])
+            object_to_save['policy'] = self._policy_networks
+            object_to_save['critic_mean'] = snt.Sequential([self._critic_networks, acme_nets.StochasticMeanHead()])
             self._snapshotter = tf2_savers.Snapshotter(
                 objects_to_save=object_to_save)
 
@@ -169,153 +196,195 @@ class MAD3PGLearner(acme.Learner):
         self._edge_number = edge_number
         self._edge_action_size = edge_action_size
 
-    @tf.function
+        # Get trainable variables.
+        self._policy_variables = self._policy_networks.trainable_variables
+        self._critic_variables = (
+            self._observation_networks.trainable_variables + self._critic_networks.trainable_variables)
+
+        # Flat, aligned lists of the online -> target variable pairs.
+        self._online_variables = (
+            *self._observation_networks.variables,
+            *self._critic_networks.variables,
+            *self._policy_networks.variables,
+        )
+        self._target_variables = (
+            *self._target_observation_networks.variables,
+            *self._target_critic_networks.variables,
+            *self._target_policy_networks.variables,
+        )
+        # Sonnet creates variables lazily, so networks that were never called would
+        # leave these lists empty and the learner would silently train nothing.
+        if not (self._policy_variables and self._critic_variables and self._target_variables):
+            raise ValueError(
+                'The online and target networks must create their variables (e.g. with '
+                '`tf2_utils.create_variables`) before the learner is built.')
+
+        # The step graph no longer grows quadratically with the number of edges nor
+        # holds a persistent tape, so it is compiled with XLA as a whole. No input
+        # signature is pinned: the replicator clones the function it runs on each
+        # replica and calls the clone with (args, kwargs), which a one-argument
+        # signature rejects. The Reverb dataset batches with `drop_remainder=True`
+        # so its shapes never change, and `experimental_relax_shapes` traces a
+        # batch-size agnostic step once a second batch size is seen.
+        self._step = tf.function(
+            self._step, jit_compile=True, experimental_relax_shapes=True)
+
+    @staticmethod
+    def _wrap_dataset(
+        dataset: tf.data.Dataset,
+        batch_size: int,
+        shuffle_buffer_size: Optional[int] = None,
+    ) -> tf.data.Dataset:
+        """Creates the dataset the learner samples from.
+
+        A dataset of known, finite size (e.g. a fixed offline replay) is cached
+        and shuffled sample by sample before it is batched and repeated, so that
+        later epochs do not recompute the upstream transformations and every
+        epoch draws new batches. Datasets of unknown or infinite size are never
+        cached. Batches always drop the remainder, so the batch dimension is
+        static, and the result is prefetched with `tf.data.AUTOTUNE`.
+
+        Args:
+        dataset: a dataset of unbatched samples.
+        batch_size: the number of samples in a batch.
+        shuffle_buffer_size: the shuffle buffer size for finite datasets, by
+            default the size of the dataset.
+        """
+        cardinality = int(dataset.cardinality())
+        if 0 < cardinality < batch_size:
+            raise ValueError(
+                f'The dataset has {cardinality} samples, fewer than a batch of {batch_size}.')
+        if cardinality > 0:
+            dataset = dataset.cache()
+            dataset = dataset.shuffle(shuffle_buffer_size or cardinality)
+            dataset = dataset.batch(batch_size, drop_remainder=True)
+            dataset = dataset.repeat()
+        else:
+            dataset = dataset.batch(batch_size, drop_remainder=True)
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
     def _step(self, sample) -> Dict[str, tf.Tensor]:
         transitions: types.Transition = sample.data  # Assuming ReverbSample.
         # Cast the additional discount to match the environment discount dtype.
         discount = tf.cast(self._discount, dtype=tf.float64)
 
-        with GradientTape(persistent=True) as tape:
+        with GradientTape() as tape:
             """Compute the loss for the policy and critic of edge nodes."""
-            critic_losses = [[] for _ in range(self._edge_number)]
-            policy_losses = [[] for _ in range(self._edge_number)]
             """Deal with the observations."""
             # the shpae of the transitions.observation is [batch_size, edge_number, edge_observation_size]
-            batch_size = transitions.observation.shape[0]
+            # The batch size is read dynamically, so the step stays valid once
+            # `experimental_relax_shapes` generalises the batch dimension to None.
+            batch_size = tf.shape(transitions.observation)[0]
+            edge_number = self._edge_number or transitions.observation.shape[1]
+            edge_action_size = self._edge_action_size or transitions.action.shape[-1]
             
             # myapp.debug(f"observation: {np.array(transitions.observation)}")
             
             # NOTE: the input of the edge_observation_network is 
             # [batch_size, edge_observation_size]
-            # a_t_list = []
-            # for i in range(len(self._target_observation_networks)):
-            #     observation = transitions.observation[:, i, :]
-            #     o_t = self._target_observation_networks[i](observation)
-            #     o_t = tree.map_structure(tf.stop_gradient, o_t)
-            #     a_t = self._target_policy_networks[i](o_t)
-            #     a_t_list.append(a_t)
-            
-            # edge_a_t = tf.concat([a_t_list[i] for i in range(len(self._target_observation_networks))], axis=1)
-            
-            a_t_list = []
-            for i in range(len(self._target_observation_networks)):
-                observation = transitions.next_observation[:, i, :]
-                o_t = self._target_observation_networks[i](observation)
-                o_t = tree.map_structure(tf.stop_gradient, o_t)
-                a_t = self._target_policy_networks[i](o_t)
-                a_t_list.append(a_t)
-            
-            edge_next_a_t = tf.concat([a_t_list[i] for i in range(len(self._target_observation_networks))], axis=1)
-            
-            
-            for edge_index in range(self._edge_number):
-
-                o_tm1 = self._observation_networks[edge_index](
-                    transitions.observation[:, edge_index, :])
-                
-                o_t = self._target_observation_networks[edge_index](
-                    transitions.next_observation[:, edge_index, :])
-                
-                o_t = tree.map_structure(tf.stop_gradient, o_t)
-
-                # Critic learning.
-                q_tm1 = self._critic_networks[edge_index](o_tm1, tf.reshape(transitions.action, shape=[batch_size, -1]))
-                q_t = self._target_critic_networks[edge_index](o_t, tf.reshape(edge_next_a_t, shape=[batch_size, -1]))
-
-                # Critic loss.
-                rewards = transitions.reward[:, edge_index]
-                for i in range(self._edge_number):
-                    rewards[i] = transitions.reward[:, -1]
-                critic_loss = losses.categorical(q_tm1, rewards,
-                                                discount * transitions.discount, q_t)
-                
-                # myapp.debug(f"edge_index: {edge_index}")
-                # myapp.debug(f"critic_loss: {np.array(critic_loss)}")
-                
-                critic_losses[edge_index].append(critic_loss)
-
-                # Actor learning
-                if edge_index == 0:
-                    dpg_a_t = self._policy_networks[edge_index](o_t)
-                else:
-                    dpg_a_t = tf.reshape(edge_next_a_t, shape=[batch_size, self._edge_number, self._edge_action_size])[:, 0, :]
-                for i in range(self._edge_number):
-                    if i != 0 and i != edge_index:
-                        dpg_a_t = tf.concat([dpg_a_t, tf.reshape(edge_next_a_t, shape=[batch_size, self._edge_number, self._edge_action_size])[:, i, :]], axis=1)
-                    elif i != 0 and i == edge_index:
-                        dpg_a_t = tf.concat([dpg_a_t, self._policy_networks[edge_index](o_t)], axis=1)
-                
-                dpg_z_t = self._critic_networks[edge_index](o_t, dpg_a_t)
+            # All edges share the networks, so fold the edge dimension into the
+            # batch and run each network once on [batch_size * edge_number, ...].
+            # Row b * edge_number + e of every tensor below belongs to edge e, so
+            # the batch-major layout of the samples is flattened as is and needs
+            # no edge-major transpose.
+            observations = tf.reshape(
+                transitions.observation, [batch_size * edge_number, -1])
+            next_observations = tf.reshape(
+                transitions.next_observation, [batch_size * edge_number, -1])
+
+            o_tm1 = self._observation_networks(observations)
+            o_t = self._target_observation_networks(next_observations)
+            o_t = tree.map_structure(tf.stop_gradient, o_t)
+
+            # The target joint action of all edges, [batch_size, edge_number * edge_action_size].
+            edge_next_a_t = tf.reshape(
+                self._target_policy_networks(o_t), [batch_size, edge_number * edge_action_size])
+            edge_next_a_3d = tf.reshape(
+                edge_next_a_t, [batch_size, edge_number, edge_action_size])
+
+            # The joint action taken by all edges, [batch_size, edge_number * edge_action_size].
+            flat_actions = tf.reshape(transitions.action, shape=[batch_size, -1])
+
+            # Critic learning.
+            critic_actions = tf.repeat(flat_actions, edge_number, axis=0)
+            q_tm1 = self._critic_networks(o_tm1, critic_actions)
+            q_t = self._target_critic_networks(
+                o_t, tf.repeat(edge_next_a_t, edge_number, axis=0))
+
+            # Critic loss.
+            rewards = tf.reshape(transitions.reward[:, : edge_number], [-1])
+            discounts = tf.repeat(discount * transitions.discount, edge_number, axis=0)
+            critic_loss = losses.categorical(q_tm1, rewards, discounts, q_t)
+            critic_loss = tf.reshape(critic_loss, [batch_size, edge_number])
+
+            # Actor learning
+            # For edge e take the target joint action and replace its e-th
+            # action with the online policy output of edge e.
+            online_a_t = tf.reshape(
+                self._policy_networks(o_t),
+                [batch_size, edge_number, edge_action_size])
+            dpg_a_t = splice_online_edge_actions(edge_next_a_3d, online_a_t)
+
+            with GradientTape(watch_accessed_variables=False) as dqda_tape:
+                dqda_tape.watch(dpg_a_t)
+                dpg_z_t = self._critic_networks(o_t, dpg_a_t)
                 dpg_q_t = dpg_z_t.mean()
 
-                # Actor loss. If clipping is true use dqda clipping and clip the norm.
-                dqda_clipping = 1.0 if self._clipping else None
-                # myapp.debug(f"dpg_q_t: {np.array(dpg_q_t)}")
-                # myapp.debug(f"dpg_a_t: {np.array(dpg_a_t)}")
-                policy_loss = losses.dpg(
-                    dpg_q_t,
-                    dpg_a_t,
-                    tape=tape,
-                    dqda_clipping=dqda_clipping,
-                    clip_norm=self._clipping)
-                policy_losses[edge_index].append(policy_loss)
-                
-                # myapp.debug(f"policy_loss: {np.array(policy_loss)}")
-
-            
-            
-            new_critic_losses = []
-            new_policy_losses = []
-            
-            for i in range(self._edge_number):
-                new_critic_losses.append(tf.reduce_mean(tf.stack(critic_losses[i], axis=0)))
-                new_policy_losses.append(tf.reduce_mean(tf.stack(policy_losses[i], axis=0)))
+            # Actor loss. If clipping is true use dqda clipping and clip the norm.
+            dqda_clipping = 1.0 if self._clipping else None
+            # myapp.debug(f"dpg_q_t: {np.array(dpg_q_t)}")
+            # myapp.debug(f"dpg_a_t: {np.array(dpg_a_t)}")
+            policy_loss = losses.dpg(
+                dpg_q_t,
+                dpg_a_t,
+                tape=dqda_tape,
+                dqda_clipping=dqda_clipping,
+                clip_norm=self._clipping)
+            policy_loss = tf.reshape(policy_loss, [batch_size, edge_number])
+
+            # The per-edge losses, averaged over the batch.
+            new_critic_losses = tf.reduce_mean(critic_loss, axis=0)
+            new_policy_losses = tf.reduce_mean(policy_loss, axis=0)
+
+            # The DPG loss only reaches the policy variables (dq/da is a constant
+            # target) and the critic loss only the observation and critic
+            # variables, so a single reverse pass over their sum yields both.
+            # The edges share their variables, so their losses are summed.
+            total_loss = tf.reduce_sum(new_policy_losses) + tf.reduce_sum(new_critic_losses)
             
-            # for i in range(self._edge_number):
+            # for i in range(edge_number):
             #     myapp.debug(f"new_critic_losses {i}: {np.array(new_critic_losses[i])}")
             #     myapp.debug(f"new_policy_losses {i}: {np.array(new_policy_losses[i])}")
         
         # Get trainable variables.
-        policy_variables = [self._policy_networks[i].trainable_variables for i in range(self._edge_number)]
-        critic_variables = [(
-            self._observation_networks[i].trainable_variables + self._critic_networks[i].trainable_variables
-        ) for i in range(self._edge_number)]
+        policy_variables = self._policy_variables
+        critic_variables = self._critic_variables
         
         # Compute gradients.
         replica_context = tf.distribute.get_replica_context()
         
-        policy_gradients =  [average_gradients_across_replicas(
+        gradients = average_gradients_across_replicas(
             replica_context,
-            tape.gradient(new_policy_losses[edge_index], policy_variables[edge_index])) for edge_index in range(self._edge_number)]
-        critic_gradients =  [average_gradients_across_replicas(
-            replica_context,
-            tape.gradient(new_critic_losses[edge_index], critic_variables[edge_index])) for edge_index in range(self._edge_number)]
-        
-        # for edge_index in range(self._edge_number):
+            tape.gradient(total_loss, policy_variables + critic_variables))
+        policy_gradients = gradients[: len(policy_variables)]
+        critic_gradients = gradients[len(policy_variables) :]
         
-        #     myapp.debug(f"policy_gradients {edge_index}: {np.array(policy_gradients[edge_index])}")
-        #     myapp.debug(f"critic_gradients {edge_index}: {np.array(critic_gradients[edge_index])}")
+        # myapp.debug(f"policy_gradients: {np.array(policy_gradients)}")
+        # myapp.debug(f"critic_gradients: {np.array(critic_gradients)}")
         
-        # Delete the tape manually because of the persistent=True flag.
-        del tape
-
         # Maybe clip gradients.
         if self._clipping:
-            policy_gradients = [tf.clip_by_global_norm(policy_gradient, 40.)[0] for policy_gradient in policy_gradients]
-            critic_gradients = [tf.clip_by_global_norm(critic_gradient, 40.)[0] for critic_gradient in critic_gradients]
+            policy_gradients = tf.clip_by_global_norm(policy_gradients, 40.)[0]
+            critic_gradients = tf.clip_by_global_norm(critic_gradients, 40.)[0]
             
-        # for edge_index in range(self._edge_number):
-        #     myapp.debug(f"policy_gradients {edge_index}: {np.array(policy_gradients[edge_index])}")
-        #     myapp.debug(f"critic_gradients {edge_index}: {np.array(critic_gradients[edge_index])}")
         # Apply gradients.
-        for edge_index in range(self._edge_number):
-            self._policy_optimizers[edge_index].apply(
-                policy_gradients[edge_index], policy_variables[edge_index])
-            self._critic_optimizers[edge_index].apply(
-                critic_gradients[edge_index], critic_variables[edge_index])
+        self._policy_optimizers.apply(
+            policy_gradients, policy_variables)
+        self._critic_optimizers.apply(
+            critic_gradients, critic_variables)
         # Losses to track.
         object_to_return = dict()
-        for edge_index in range(self._edge_number):
+        for edge_index in range(edge_number):
             object_to_return['policy_loss_' + str(edge_index)] = new_policy_losses[edge_index]
             object_to_return['critic_loss_' + str(edge_index)] = new_critic_losses[edge_index]
         
@@ -323,30 +392,42 @@ class MAD3PGLearner(acme.Learner):
 
     @tf.function
     def _replicated_step(self):
-        # Update target network
-        online_variables = [(
-            *self._observation_networks[i].variables,
-            *self._critic_networks[i].variables,
-            *self._policy_networks[i].variables,
-        ) for i in range(len(self._observation_networks))]
-        
-        target_variables = [(
-            *self._target_observation_networks[i].variables,
-            *self._target_critic_networks[i].variables,
-            *self._target_policy_networks[i].variables,
-        ) for i in range(len(self._target_observation_networks))]
-        
-        # Make online -> target network update ops.
-        if tf.math.mod(self._num_steps, self._target_update_period) == 0:
-            for online, target in zip(online_variables, target_variables):
-                for src, dest in zip(online, target):
-                    dest.assign(src)
-        self._num_steps.assign_add(1)
-
         # Get data from replay (dropping extras if any). Note there is no
         # extra data here because we do not insert any into Reverb.
         sample = next(self._iterator)
 
+        # Update target network
+        # NOTE: the target variables keep the dtype of the online ones. They are
+        # what `get_variables` serves to the actors, whose policy networks are
+        # built from the same (float64) specs, so a reduced-precision copy cannot
+        # be assigned back into them.
+
+        # Make online -> target network update ops, grouped into a single
+        # branch of an explicit `tf.cond`.
+        def update_target_networks():
+            return tf.group(*[
+                dest.assign(src) for src, dest in zip(self._online_variables, self._target_variables)])
+
+        if self._tau is not None:
+            # Soft update: target <- target + tau * (online - target). The target
+            # networks are initialised independently of the online ones, so they
+            # are hard-copied on the first step before the soft updates start.
+            def soft_update_target_networks():
+                return tf.group(*[
+                    dest.assign_sub(self._tau * (dest - src))
+                    for src, dest in zip(self._online_variables, self._target_variables)])
+
+            tf.cond(
+                tf.equal(self._num_steps, 0),
+                update_target_networks,
+                soft_update_target_networks)
+        else:
+            tf.cond(
+                tf.equal(tf.math.mod(self._num_steps, self._target_update_period), 0),
+                update_target_networks,
+                tf.no_op)
+        self._num_steps.assign_add(1)
+
         # This mirrors the structure of the fetches returned by self._step(),
         # but the Tensors are replaced with replicated Tensors, one per accelerator.
         replicated_fetches = self._replicator.run(self._step, args=(sample,))
@@ -378,11 +459,14 @@ class MAD3PGLearner(acme.Learner):
         counts = self._counter.increment(steps=1, walltime=elapsed_time)
         fetches.update(counts)
 
-        # Checkpoint and attempt to write the logs.
-        if self._checkpointer is not None:
-            self._checkpointer.save()
-        if self._snapshotter is not None:
-            self._snapshotter.save()
+        # Checkpoint every `save_period` steps and attempt to write the logs.
+        self._steps_since_save += 1
+        if self._steps_since_save >= self._save_period:
+            self._steps_since_save = 0
+            if self._checkpointer is not None:
+                self._checkpointer.save()
+            if self._snapshotter is not None:
+                self._snapshotter.save()
         self._logger.write(fetches)
 
     def get_variables(self, names: List[str]) -> List[List[np.ndarray]]:
@@ -414,6 +498,26 @@ def get_first_available_accelerator_type(
         f'Only the following types are available: {available}.')
 
 
+def splice_online_edge_actions(
+    target_actions: tf.Tensor, online_actions: tf.Tensor) -> tf.Tensor:
+    """Returns the joint actions the policy of every edge is evaluated at.
+    Args:
+        target_actions: the target policy actions of all edges, of shape
+        [batch_size, edge_number, edge_action_size].
+        online_actions: the online policy actions of all edges, of the same shape.
+    Returns:
+        A [batch_size * edge_number, edge_number * edge_action_size] tensor. Its
+        row b * edge_number + e is the target joint action of sample b in which
+        the action of edge e is replaced by its online action.
+    """
+    edge_number, edge_action_size = target_actions.shape[1:]
+    edge_mask = tf.eye(edge_number, dtype=online_actions.dtype)[:, :, None]
+    joint_actions = (
+        target_actions[:, None, :, :] * (1. - edge_mask) +
+        online_actions[:, :, None, :] * edge_mask)
+    return tf.reshape(joint_actions, [-1, edge_number * edge_action_size])
+
+
 def average_gradients_across_replicas(replica_context, gradients):
     """Computes the average gradient across replicas.
     This computes the gradient locally on this device, then copies over the
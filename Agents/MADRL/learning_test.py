@@ -0,0 +1,261 @@
+"""Tests for the MAD3PG learner."""
+import sys
+sys.path.append(r"/home/neardws/Documents/Game-Theoretic-Deep-Reinforcement-Learning/")
+import numpy as np
+import reverb
+import sonnet as snt
+import tensorflow as tf
+from absl.testing import absltest
+from acme import specs
+from acme import types
+from acme.tf import losses
+from acme.tf import utils as tf2_utils
+from Agents.MADRL import learning
+from Agents.MADRL.networks import make_default_MAD3PGNetworks
+
+EDGE_NUMBER = 3
+EDGE_OBSERVATION_SIZE = 4
+EDGE_ACTION_SIZE = 2
+BATCH_SIZE = 5
+DISCOUNT = 0.9
+
+
+def make_networks():
+    """Creates tiny networks with their variables."""
+    action_spec = specs.BoundedArray(
+        shape=(EDGE_ACTION_SIZE, ), dtype=float, minimum=-1., maximum=1.)
+    networks = make_default_MAD3PGNetworks(
+        action_spec=action_spec,
+        policy_layer_sizes=(8, ),
+        critic_layer_sizes=(8, ),
+        num_atoms=11,
+    )
+    observation_spec = specs.Array(shape=(EDGE_OBSERVATION_SIZE, ), dtype=float)
+    critic_action_spec = specs.Array(shape=(EDGE_NUMBER * EDGE_ACTION_SIZE, ), dtype=float)
+    emb_spec = tf2_utils.create_variables(networks.observation_network, [observation_spec])
+    tf2_utils.create_variables(networks.policy_network, [emb_spec])
+    tf2_utils.create_variables(networks.critic_network, [emb_spec, critic_action_spec])
+    return networks
+
+
+def make_sample(batch_shape=(BATCH_SIZE, )) -> reverb.ReplaySample:
+    """Creates a random sample of transitions with the given batch shape."""
+    batch_shape = list(batch_shape)
+    transition = types.Transition(
+        observation=tf.random.normal(
+            batch_shape + [EDGE_NUMBER, EDGE_OBSERVATION_SIZE], dtype=tf.float64),
+        action=tf.random.uniform(
+            batch_shape + [EDGE_NUMBER, EDGE_ACTION_SIZE], -1., 1., dtype=tf.float64),
+        reward=tf.random.normal(batch_shape + [EDGE_NUMBER + 1], dtype=tf.float64),
+        discount=tf.ones(batch_shape, dtype=tf.float64),
+        next_observation=tf.random.normal(
+            batch_shape + [EDGE_NUMBER, EDGE_OBSERVATION_SIZE], dtype=tf.float64),
+    )
+    info = reverb.SampleInfo(*[
+        tf.zeros(batch_shape, dtype) for dtype in reverb.SampleInfo.tf_dtypes()])
+    return reverb.ReplaySample(info=info, data=transition)
+
+
+def make_learner(networks, target_networks, dataset_iterator, **kwargs):
+    return learning.MAD3PGLearner(
+        policy_networks=networks.policy_network,
+        critic_networks=networks.critic_network,
+
+        target_policy_networks=target_networks.policy_network,
+        target_critic_networks=target_networks.critic_network,
+
+        discount=DISCOUNT,
+        target_update_period=100,
+        dataset_iterator=dataset_iterator,
+
+        observation_networks=networks.observation_network,
+        target_observation_networks=target_networks.observation_network,
+
+        policy_optimizers=None,
+        critic_optimizers=None,
+
+        checkpoint=False,
+        **kwargs,
+    )
+
+
+def reference_losses(networks, target_networks, sample):
+    """Computes the per-edge losses with one loop over the edges."""
+    transitions = sample.data
+    batch_size = transitions.observation.shape[0]
+
+    target_actions = [
+        target_networks.policy_network(
+            target_networks.observation_network(transitions.next_observation[:, i, :]))
+        for i in range(EDGE_NUMBER)]
+    edge_next_a_t = tf.concat(target_actions, axis=1)
+
+    critic_losses = []
+    policy_losses = []
+    for edge_index in range(EDGE_NUMBER):
+        o_tm1 = networks.observation_network(transitions.observation[:, edge_index, :])
+        o_t = target_networks.observation_network(transitions.next_observation[:, edge_index, :])
+
+        q_tm1 = networks.critic_network(o_tm1, tf.reshape(transitions.action, [batch_size, -1]))
+        q_t = target_networks.critic_network(o_t, edge_next_a_t)
+        critic_loss = losses.categorical(
+            q_tm1, transitions.reward[:, edge_index], DISCOUNT * transitions.discount, q_t)
+        critic_losses.append(tf.reduce_mean(critic_loss))
+
+        edge_actions = list(target_actions)
+        edge_actions[edge_index] = networks.policy_network(o_t)
+        dpg_a_t = tf.concat(edge_actions, axis=1)
+        with tf.GradientTape() as tape:
+            tape.watch(dpg_a_t)
+            dpg_q_t = networks.critic_network(o_t, dpg_a_t).mean()
+        policy_loss = losses.dpg(
+            dpg_q_t, dpg_a_t, tape=tape, dqda_clipping=1.0, clip_norm=True)
+        policy_losses.append(tf.reduce_mean(policy_loss))
+
+    return critic_losses, policy_losses
+
+
+class MAD3PGLearnerTest(absltest.TestCase):
+
+    def test_splice_online_edge_actions(self):
+        target_actions = tf.random.normal(
+            [BATCH_SIZE, EDGE_NUMBER, EDGE_ACTION_SIZE], dtype=tf.float64)
+        online_actions = tf.random.normal(
+            [BATCH_SIZE, EDGE_NUMBER, EDGE_ACTION_SIZE], dtype=tf.float64)
+
+        joint_actions = learning.splice_online_edge_actions(target_actions, online_actions)
+        joint_actions = np.reshape(
+            joint_actions.numpy(), [BATCH_SIZE, EDGE_NUMBER, EDGE_NUMBER, EDGE_ACTION_SIZE])
+
+        for edge_index in range(EDGE_NUMBER):
+            for slot_index in range(EDGE_NUMBER):
+                expected = online_actions if slot_index == edge_index else target_actions
+                np.testing.assert_array_equal(
+                    joint_actions[:, edge_index, slot_index], expected[:, slot_index].numpy())
+
+    def test_losses_match_per_edge_reference(self):
+        networks = make_networks()
+        target_networks = make_networks()
+        sample = make_sample()
+
+        expected_critic_losses, expected_policy_losses = reference_losses(
+            networks, target_networks, sample)
+
+        learner = make_learner(networks, target_networks, iter([sample]))
+        fetches = learner._step(sample)
+
+        for edge_index in range(EDGE_NUMBER):
+            np.testing.assert_allclose(
+                fetches['critic_loss_' + str(edge_index)].numpy(),
+                expected_critic_losses[edge_index].numpy(), rtol=1e-6)
+            np.testing.assert_allclose(
+                fetches['policy_loss_' + str(edge_index)].numpy(),
+                expected_policy_losses[edge_index].numpy(), rtol=1e-6)
+
+    def test_rejects_networks_without_variables(self):
+        action_spec = specs.BoundedArray(
+            shape=(EDGE_ACTION_SIZE, ), dtype=float, minimum=-1., maximum=1.)
+        networks = make_default_MAD3PGNetworks(action_spec=action_spec)
+
+        with self.assertRaises(ValueError):
+            make_learner(networks, make_networks(), iter([]))
+
+    def test_step_accepts_varying_batch_sizes(self):
+        networks = make_networks()
+        target_networks = make_networks()
+        learner = make_learner(networks, target_networks, iter([]))
+
+        # The second batch size relaxes the batch dimension of the trace to None.
+        for batch_size in (BATCH_SIZE, BATCH_SIZE - 2, BATCH_SIZE + 1):
+            fetches = learner._step(make_sample(batch_shape=(batch_size, )))
+            self.assertEqual(fetches['critic_loss_0'].shape, ())
+
+    def test_soft_target_updates(self):
+        for tau in (1.0, 0.1):
+            replicator = snt.distribute.Replicator()
+            with replicator.scope():
+                networks = make_networks()
+                target_networks = make_networks()
+            dataset = tf.data.Dataset.from_tensors(make_sample()).repeat()
+            iterator = iter(replicator.experimental_distribute_dataset(dataset))
+            learner = make_learner(
+                networks, target_networks, iterator, replicator=replicator, tau=tau)
+
+            # The targets are updated before the gradient step, from the online
+            # variables as they were when the step started.
+            online = [v.numpy() for v in learner._online_variables]
+            learner.step()
+
+            # The first step hard-copies the online variables, whatever tau is.
+            for target_variable, expected in zip(learner._target_variables, online):
+                np.testing.assert_allclose(target_variable.numpy(), expected)
+
+            online = [v.numpy() for v in learner._online_variables]
+            target = [v.numpy() for v in learner._target_variables]
+            learner.step()
+
+            for target_variable, online_value, target_value in zip(
+                    learner._target_variables, online, target):
+                np.testing.assert_allclose(
+                    target_variable.numpy(),
+                    target_value + tau * (online_value - target_value))
+
+    def test_wrap_dataset_batches_after_shuffling(self):
+        reads = []
+
+        def read(sample):
+            reads.append(int(sample))
+            return sample
+
+        dataset = tf.data.Dataset.range(8).map(
+            lambda sample: tf.ensure_shape(tf.py_function(read, [sample], tf.int64), []))
+
+        dataset = learning.MAD3PGLearner._wrap_dataset(dataset, batch_size=4)
+        self.assertEqual(dataset.element_spec.shape.as_list(), [4])
+        iterator = iter(dataset)
+
+        # Ten epochs of two batches each.
+        batches = set(frozenset(next(iterator).numpy()) for _ in range(20))
+
+        # Shuffling whole batches would only ever yield the two batches of the
+        # first epoch; shuffling samples before batching mixes them.
+        self.assertGreater(len(batches), 2)
+        # The upstream dataset is read once and then served from the cache.
+        self.assertCountEqual(reads, range(8))
+
+    def test_wrap_dataset_rejects_datasets_smaller_than_a_batch(self):
+        with self.assertRaises(ValueError):
+            learning.MAD3PGLearner._wrap_dataset(tf.data.Dataset.range(3), batch_size=4)
+
+    def test_step_on_cpu(self):
+        # Mirror the agent: a replicated dataset iterator and the
+        # `snt.distribute.Replicator` over the visible (CPU) devices.
+        replicator = snt.distribute.Replicator()
+        with replicator.scope():
+            networks = make_networks()
+            target_networks = make_networks()
+        dataset = tf.data.Dataset.from_tensors(make_sample()).repeat()
+        iterator = iter(replicator.experimental_distribute_dataset(dataset))
+
+        learner = make_learner(
+            networks, target_networks, iterator, replicator=replicator)
+
+        for _ in range(3):
+            learner.step()
+
+    def test_step_from_dataset(self):
+        replicator = snt.distribute.Replicator()
+        with replicator.scope():
+            networks = make_networks()
+            target_networks = make_networks()
+        dataset = tf.data.Dataset.from_tensor_slices(make_sample(batch_shape=(4 * BATCH_SIZE, )))
+
+        learner = make_learner(
+            networks, target_networks, dataset, replicator=replicator, batch_size=BATCH_SIZE)
+
+        for _ in range(3):
+            learner.step()
+
+
+if __name__ == '__main__':
+    absltest.main()
@@ -102,9 +102,9 @@ def make_default_MAD3PGNetworks(
     vmin: float = -150.,
     vmax: float = 150.,
     num_atoms: int = 51,
-    edge_number: int = 9,
 ):
-    from Agents.MAD4PG.agent import MAD3PGNetwork
+    # The returned networks are shared by all edges; the learner applies them
+    # with the edge dimension folded into the batch.
 
     # Get total number of action dimensions from action spec.
     num_dimensions = np.prod(action_spec.shape, dtype=int)
@@ -127,8 +127,8 @@ def make_default_MAD3PGNetworks(
         networks.DiscreteValuedHead(vmin, vmax, num_atoms),
     ])
 
-    return [MAD3PGNetwork(
+    return MAD3PGNetwork(
         policy_network=policy_network,
         critic_network=critic_network,
         observation_network=observation_network,
-    ) for _ in range(edge_number)]
\ No newline at end of file
+    )
\ No newline at end of file